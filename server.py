@@ -7,14 +7,22 @@ An MCP server that exposes:
 
 Transport: Streamable HTTP on port 8765
 """
-import json
+import asyncio
+import csv
+import functools
 import logging
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
 
 import httpx
+import orjson
 import polars as pl
-from mcp.server.fastmcp import FastMCP
+from cachetools import TTLCache
+from mcp.server.fastmcp import Context, FastMCP
 
 # =============================================================================
 # CONFIGURATION
@@ -31,11 +39,54 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+async def _log_content_encoding(response: httpx.Response) -> None:
+    """Log which compression the upstream API used for a response."""
+    encoding = response.headers.get("content-encoding", "identity")
+    logger.debug(f"{response.request.url.host} responded with content-encoding: {encoding}")
+
+
+@dataclass
+class AppContext:
+    """Resources the FastMCP lifespan hands to every tool call."""
+
+    http: httpx.AsyncClient
+
+
+@asynccontextmanager
+async def _lifespan(server: FastMCP) -> AsyncIterator[AppContext]:
+    """
+    Open the async HTTP client tools await, and close its connection pool on shutdown.
+
+    With streamable HTTP, FastMCP enters the lifespan once per client session, so
+    each session gets its own pool; the response caches below stay process-wide.
+    """
+    client = httpx.AsyncClient(
+        timeout=30.0,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        # Concurrent requests to the same host multiplex over one connection
+        http2=True,
+        # API JSON compresses well; httpx decodes gzip/brotli transparently
+        headers={"Accept-Encoding": "gzip, br", "User-Agent": "mcp-world-bank/1.0"},
+        event_hooks={"response": [_log_content_encoding]},
+    )
+    try:
+        yield AppContext(http=client)
+    finally:
+        await client.aclose()
+
+
+# API response caches - live data is effectively static within a run.
+# Only touched from the event loop thread, so no lock is needed.
+_WB_CACHE: TTLCache = TTLCache(maxsize=4096, ttl=3600)
+_RC_CACHE: TTLCache = TTLCache(maxsize=512, ttl=86400)
+
 # Initialize MCP server
 mcp = FastMCP(
     "world-bank-server",
     host=HOST,
     port=PORT,
+    lifespan=_lifespan,
 )
 
 
@@ -43,40 +94,220 @@ mcp = FastMCP(
 # PRIVATE HELPER FUNCTIONS
 # =============================================================================
 
-def _load_data() -> pl.DataFrame:
-    """Load the World Bank indicators CSV file."""
+def _scan_data() -> pl.LazyFrame:
+    """Lazily scan the World Bank indicators CSV file."""
     if not DATA_FILE.exists():
         raise FileNotFoundError(f"Data file not found: {DATA_FILE}")
-    return pl.read_csv(DATA_FILE)
+    return pl.scan_csv(DATA_FILE)
+
+
+def _load_rows() -> list[dict]:
+    """Read the World Bank indicators CSV into plain dicts with typed year/value."""
+    if not DATA_FILE.exists():
+        raise FileNotFoundError(f"Data file not found: {DATA_FILE}")
+    with DATA_FILE.open(newline="") as f:
+        rows = list(csv.DictReader(f))
+    for row in rows:
+        row["year"] = int(row["year"])
+        row["value"] = float(row["value"]) if row["value"] else None
+    return rows
+
 
+def _http_client(ctx: Context) -> httpx.AsyncClient:
+    """Return the HTTP client opened by the lifespan for this session."""
+    return ctx.request_context.lifespan_context.http
 
-def _fetch_rest_countries(country_code: str) -> dict:
+
+@functools.lru_cache(maxsize=1024)
+def _norm(code: str) -> str:
+    """Normalize a country code (country codes are a tiny keyspace, so cache them)."""
+    return code.strip().upper() if code else ""
+
+
+async def _fetch_rest_countries(client: httpx.AsyncClient, country_code: str) -> dict:
     """Fetch country info from REST Countries API."""
+    key = country_code.upper()
+    cached = _RC_CACHE.get(key)
+    if cached is not None:
+        return cached
+
     url = f"https://restcountries.com/v3.1/alpha/{country_code}"
-    with httpx.Client(timeout=30.0) as client:
-        response = client.get(url)
-        response.raise_for_status()
-        return response.json()[0]
+    response = await client.get(url)
+    response.raise_for_status()
+    country = orjson.loads(response.content)[0]
+
+    _RC_CACHE[key] = country
+    return country
 
 
-def _fetch_world_bank_indicator(
+async def _fetch_world_bank_indicator(
+    client: httpx.AsyncClient,
     country_code: str,
     indicator: str,
     year: Optional[int] = None,
 ) -> list:
     """Fetch indicator from World Bank API."""
+    key = (country_code.upper(), indicator, year)
+    cached = _WB_CACHE.get(key)
+    if cached is not None:
+        return cached
+
     url = f"https://api.worldbank.org/v2/country/{country_code}/indicator/{indicator}"
     params = {"format": "json", "per_page": 100}
-    if year:
+    if year is not None:
+        # The date filter leaves a single record, don't page through the whole series
+        params["date"] = str(year)
+        params["per_page"] = 1
+
+    response = await client.get(url, params=params)
+    response.raise_for_status()
+    data = orjson.loads(response.content)
+    records = data[1] if len(data) >= 2 and data[1] else []
+
+    _WB_CACHE[key] = records
+    return records
+
+
+async def _fetch_world_bank_indicator_multi(
+    client: httpx.AsyncClient,
+    country_codes: list[str],
+    indicator: str,
+    year: Optional[int] = None,
+) -> Optional[dict[str, list]]:
+    """
+    Fetch indicator for several countries in a single World Bank API request.
+
+    Returns records grouped by both the ISO2 and ISO3 code of each country (callers
+    may pass either), or None if the API rejected the batch - one invalid code
+    makes the World Bank return an error message for the whole request. Each
+    group is also written to _WB_CACHE so per-country lookups reuse it.
+    """
+    joined = ";".join(dict.fromkeys(country_codes))
+    url = f"https://api.worldbank.org/v2/country/{joined}/indicator/{indicator}"
+    params = {"format": "json", "per_page": 1000}
+    if year is not None:
         params["date"] = str(year)
 
-    with httpx.Client(timeout=30.0) as client:
-        response = client.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-        if len(data) < 2 or not data[1]:
-            return []
-        return data[1]
+    response = await client.get(url, params=params)
+    response.raise_for_status()
+    data = orjson.loads(response.content)
+    if len(data) < 2:
+        return None
+
+    grouped: dict[str, list] = {}
+    for record in data[1] or []:
+        for key in (record.get("country", {}).get("id"), record.get("countryiso3code")):
+            if key:
+                grouped.setdefault(key.upper(), []).append(record)
+
+    for code in country_codes:
+        grouped.setdefault(code.upper(), [])
+    for code, records in grouped.items():
+        _WB_CACHE[(code, indicator, year)] = records
+    return grouped
+
+
+def _indicator_result(records: list, indicator: str, year: int) -> dict:
+    """Shape the record for the requested year into the tool response."""
+    record = records[0] if records else None
+
+    # Cheap guard so an unfiltered series never passes off its latest year as the answer
+    if not record or record.get("date") != str(year):
+        return {
+            "error": f"No data available for year {year}."
+        }
+
+    value = record.get("value")
+
+    if value is None:
+        return {
+            "error": f"Indicator '{indicator}' has no reported value for {year}."
+        }
+
+    return {
+        "country": record.get("country", {}).get("id"),
+        "country_name": record.get("country", {}).get("value"),
+        "indicator": record.get("indicator", {}).get("id"),
+        "indicator_name": record.get("indicator", {}).get("value"),
+        "year": int(record.get("date")),
+        "value": value
+    }
+
+
+def _code_error(code: str) -> Optional[dict]:
+    """Return an error for a missing or malformed country code, if any."""
+    if not code:
+        return {"error": "country_code is required."}
+    # Only reject codes that can't be an alpha-2/alpha-3/numeric code; whether a
+    # well-formed code exists is left to the API, which knows more codes than the CSV
+    if len(code) not in (2, 3) or not (code.isascii() and code.isalnum()):
+        return {"error": f"Invalid country code '{code}'."}
+    return None
+
+
+async def _build_indicator_result(
+    client: httpx.AsyncClient,
+    country_code: str,
+    indicator: str,
+    year: int,
+) -> dict:
+    """Validate inputs, fetch one country's indicator and build the tool response."""
+    code = _norm(country_code)
+
+    ind = (indicator or "").strip()
+
+    error = _code_error(code)
+    if error:
+        return error
+
+    if not ind:
+        return {"error": "indicator is required."}
+
+    try:
+        records = await _fetch_world_bank_indicator(client, code, ind, year)
+    except httpx.HTTPStatusError:
+        return {"error": f"Invalid country code or indicator: '{code}', '{ind}'."}
+    except Exception as e:
+        logger.exception("World Bank API error")
+        return {"error": "Unexpected API error.", "details": str(e)}
+
+    return _indicator_result(records, ind, year)
+
+
+# =============================================================================
+# PRECOMPUTED RESOURCE PAYLOADS
+# =============================================================================
+# The CSV never changes while the server runs, so resource responses are
+# serialized once at startup instead of on every call.
+
+def _build_payloads() -> tuple[str, dict[str, str]]:
+    """
+    Serialize the country list and each country's records from one CSV read.
+
+    The row dicts are only needed while serializing, so they are dropped on
+    return and just the JSON strings stay resident.
+    """
+    by_country: dict[str, list[dict]] = defaultdict(list)
+    for row in _load_rows():
+        by_country[row["countryiso3code"]].append(row)
+
+    countries = orjson.dumps([
+        {"countryiso3code": code, "country": rows[0]["country"]}
+        for code, rows in by_country.items()
+    ]).decode()
+    indicators = {code: orjson.dumps(rows).decode() for code, rows in by_country.items()}
+    return countries, indicators
+
+
+# Polars is only kept for dtype inference - collect_schema() materializes no rows
+_SCHEMA_JSON: str = orjson.dumps(
+    {col: str(dtype) for col, dtype in _scan_data().collect_schema().items()},
+    option=orjson.OPT_INDENT_2,
+).decode()
+
+_COUNTRIES_JSON: str
+_INDICATORS_JSON: dict[str, str]
+_COUNTRIES_JSON, _INDICATORS_JSON = _build_payloads()
 
 
 # =============================================================================
@@ -90,9 +321,7 @@ def get_schema() -> str:
 
     This resource is provided as an example - it's already implemented.
     """
-    df = _load_data()
-    schema_info = {col: str(dtype) for col, dtype in zip(df.columns, df.dtypes)}
-    return json.dumps(schema_info, indent=2)
+    return _SCHEMA_JSON
 
 
 @mcp.resource("data://countries")
@@ -103,10 +332,7 @@ def get_countries() -> str:
     TODO: Implement this resource.
 
     Hints:
-    - Use _load_data() to get the DataFrame
-    - Use df.select() to pick relevant columns (countryiso3code, country)
-    - Use df.unique() to get unique values
-    - Return as JSON string using json.dumps() or df.write_json()
+    - The payload is built once at startup in _COUNTRIES_JSON by _build_payloads()
 
     Expected output format:
     [
@@ -115,12 +341,7 @@ def get_countries() -> str:
         ...
     ]
     """
-    df = _load_data()
-    # TODO: Implement - return unique country codes and names as JSON string
-    countries = df.select(['countryiso3code', 'country']).unique()
-    countries_list = countries.to_dicts()
-
-    return json.dumps(countries_list, indent=2)
+    return _COUNTRIES_JSON
 
 
 @mcp.resource("data://indicators/{country_code}")
@@ -134,27 +355,22 @@ def get_country_indicators(country_code: str) -> str:
         country_code: ISO 3166-1 alpha-3 country code (e.g., "USA", "CHN", "DEU")
 
     Hints:
-    - Use _load_data() to get the DataFrame
-    - Use df.filter(pl.col("countryiso3code") == country_code) to filter
-    - Return as JSON string
+    - Per-country payloads are prebuilt in _INDICATORS_JSON, so this is a dict lookup
     - Handle case where country_code is not found (return error message)
 
     Expected output: JSON array of indicator records for that country
     """
-    df = _load_data()
-    # TODO: Implement - filter by country and return as JSON string
-    country_code = (country_code or "").strip().upper()
+    country_code = _norm(country_code)
 
-    country_filter = df.filter(pl.col("countryiso3code") == country_code)
+    records = _INDICATORS_JSON.get(country_code)
 
-    if country_filter.height == 0:
-        return json.dumps({
+    if records is None:
+        # Compact like the data payloads - no pretty-printing on the bad-input path
+        return orjson.dumps({
             "error": f"Country code '{country_code}' not found."
-        }, indent = 2)
+        }).decode()
 
-    records = country_filter.to_dicts()
-
-    return json.dumps(records, indent = 2)
+    return records
 
 
 
@@ -164,7 +380,7 @@ def get_country_indicators(country_code: str) -> str:
 # =============================================================================
 
 @mcp.tool()
-def get_country_info(country_code: str) -> dict:
+async def get_country_info(country_code: str, ctx: Context) -> dict:
     """
     Fetch detailed information about a country from REST Countries API.
 
@@ -172,6 +388,7 @@ def get_country_info(country_code: str) -> dict:
 
     Args:
         country_code: ISO 3166-1 alpha-2 or alpha-3 country code (e.g., "US", "USA", "DE")
+        ctx: Request context injected by FastMCP (carries the HTTP client)
 
     Returns:
         Dictionary with country information including:
@@ -201,12 +418,13 @@ def get_country_info(country_code: str) -> dict:
     """
     logger.info(f"Fetching country info for: {country_code}")
     # TODO: Implement using _fetch_rest_countries()
-    code = (country_code or "").strip()
-    if not code:
-        return {"error": "country_code is required."}
+    code = _norm(country_code)
+    error = _code_error(code)
+    if error:
+        return error
 
     try:
-        country = _fetch_rest_countries(code)
+        country = await _fetch_rest_countries(_http_client(ctx), code)
     except httpx.HTTPStatusError:
         return {"error": f"Country code '{code}' not found."}
     except IndexError:
@@ -245,9 +463,10 @@ def get_country_info(country_code: str) -> dict:
 
 
 @mcp.tool()
-def get_live_indicator(
+async def get_live_indicator(
     country_code: str,
     indicator: str,
+    ctx: Context,
     year: int = 2022,
 ) -> dict:
     """
@@ -258,6 +477,7 @@ def get_live_indicator(
     Args:
         country_code: ISO 3166-1 alpha-2 or alpha-3 country code
         indicator: World Bank indicator ID (e.g., "NY.GDP.PCAP.CD" for GDP per capita)
+        ctx: Request context injected by FastMCP (carries the HTTP client)
         year: Year to fetch data for (default: 2022)
 
     Returns:
@@ -276,61 +496,19 @@ def get_live_indicator(
         - SE.ADT.LITR.ZS: Adult literacy rate
 
     Hints:
-    - Use _fetch_world_bank_indicator(country_code, indicator, year)
-    - The API returns a list; find the entry matching the requested year
+    - _build_indicator_result() wraps _fetch_world_bank_indicator(country_code, indicator, year)
+    - The API is queried with date=year, so the first record is the requested year
     - Handle case where no data exists for that year
     """
     logger.info(f"Fetching {indicator} for {country_code} in {year}")
-    # TODO: Implement using _fetch_world_bank_indicator()
-    code = (country_code or "").strip()
-
-    ind = (indicator or "").strip()
-
-    if not code:
-        return {"error": "country_code is required."}
-
-    if not ind:
-        return {"error": "indicator is required."}
-
-    try:
-        records = _fetch_world_bank_indicator(code, ind, year)
-    except httpx.HTTPStatusError:
-        return {"error": f"Invalid country code or indicator: '{code}', '{ind}'."}
-    except Exception as e:
-        logger.exception("World Bank API error")
-        return {"error": "Unexpected API error.", "details": str(e)}
-
-    record = next(
-            (r for r in records if r.get("date") == str(year)),
-            None
-        )
-
-    if not record:
-        return {
-            "error": f"No data available for year {year}."
-        }
-
-    value = record.get("value")
-
-    if value is None:
-        return {
-            "error": f"Indicator '{ind}' has no reported value for {year}."
-        }
-
-    return {
-        "country": record.get("country", {}).get("id"),
-        "country_name": record.get("country", {}).get("value"),
-        "indicator": record.get("indicator", {}).get("id"),
-        "indicator_name": record.get("indicator", {}).get("value"),
-        "year": int(record.get("date")),
-        "value": value
-    }
+    return await _build_indicator_result(_http_client(ctx), country_code, indicator, year)
 
 
 @mcp.tool()
-def compare_countries(
+async def compare_countries(
     country_codes: list[str],
     indicator: str,
+    ctx: Context,
     year: int = 2022,
 ) -> list[dict]:
     """
@@ -341,6 +519,7 @@ def compare_countries(
     Args:
         country_codes: List of ISO country codes to compare (e.g., ["USA", "CHN", "DEU"])
         indicator: World Bank indicator ID to compare
+        ctx: Request context injected by FastMCP (carries the HTTP client)
         year: Year to fetch data for
 
     Returns:
@@ -352,24 +531,49 @@ def compare_countries(
         - value: The indicator value (or None if not available)
 
     Hints:
-    - Loop through country_codes and call get_live_indicator() for each
+    - Serve countries already in _WB_CACHE, then fetch the rest in one request
+      with _fetch_world_bank_indicator_multi()
+    - If the batch fails, run _build_indicator_result() per country concurrently
     - Collect results into a list
     - Handle errors for individual countries (don't fail the whole request)
     """
     logger.info(f"Comparing {indicator} for countries: {country_codes}")
-    # TODO: Implement - call get_live_indicator for each country
-    results = []
-
-    for code in country_codes:
+    client = _http_client(ctx)
+    ind = (indicator or "").strip()
+    codes = [_norm(code) for code in country_codes]
+    # Malformed codes would make the API reject the whole batch, so drop them up front
+    errors = {code: _code_error(code) for code in codes}
+    valid = [code for code in codes if errors[code] is None]
+
+    records_by_code: dict[str, list] = {}
+    for code in valid:
+        cached = _WB_CACHE.get((code, ind, year))
+        if cached is not None:
+            records_by_code[code] = cached
+    misses = [code for code in valid if code not in records_by_code]
+
+    grouped: Optional[dict[str, list]] = {}
+    if not ind:
+        grouped = None
+    elif misses:
         try:
-            res = get_live_indicator(code, indicator, year)
+            grouped = await _fetch_world_bank_indicator_multi(client, misses, ind, year)
         except Exception as e:
-            logger.exception(f"Failed to retrieve data for {code}")
-            res = {"error": "Couldn't retrieve data.", "country": code, "details": str(e)}
-
-        results.append(res)
-
-    return results
+            grouped = None
+            logger.warning(f"Batched World Bank request failed, retrying per country: {e}")
+
+    if grouped is not None:
+        for code in misses:
+            records_by_code[code] = grouped.get(code, [])
+        return [
+            errors[code] or _indicator_result(records_by_code[code], ind, year)
+            for code in codes
+        ]
+
+    # One request per country so a bad code only fails its own entry
+    return list(await asyncio.gather(
+        *[_build_indicator_result(client, code, ind, year) for code in codes]
+    ))
 
 
 